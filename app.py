@@ -10,8 +10,11 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
 import os
+import threading
 import joblib
 import altair as alt
 
@@ -25,37 +28,115 @@ st.set_page_config(
 
 # --- Database Setup ---
 DB_NAME = "food_wastage.db"
+# Bytes of the database file SQLite may memory-map (256 MiB)
+MMAP_SIZE = 268435456
+
+# Source CSV for each table, loaded by init_database()
+CSV_SOURCES = {
+    'providers': 'providers_data.csv',
+    'receivers': 'receivers_data.csv',
+    'food_listings': 'food_listings_data.csv',
+    'claims': 'claims_data.csv',
+}
+
+def read_csv_fast(csv_file):
+    """Reads a CSV with the PyArrow engine, falling back to pandas' C parser if PyArrow is unavailable."""
+    try:
+        return pd.read_csv(csv_file, engine='pyarrow', dtype_backend='pyarrow')
+    except ImportError:
+        return pd.read_csv(csv_file, engine='c')
+
+@st.cache_resource
+def init_database():
+    """
+    Populates the SQLite database from the CSV files. This function is cached
+    so it only runs once per process. A table is only rebuilt when its source CSV
+    has changed since it was last loaded (tracked in `schema_version`), so edits
+    made through the app are kept across restarts.
+    """
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute("CREATE TABLE IF NOT EXISTS schema_version (Table_Name TEXT PRIMARY KEY, CSV_Mtime REAL);")
+    loaded_mtimes = dict(conn.execute("SELECT Table_Name, CSV_Mtime FROM schema_version;").fetchall())
+    existing_tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+
+    with conn:
+        # sqlite3 doesn't implicitly open a transaction before DDL, so begin one explicitly;
+        # the DROP/CREATE of every reloaded table then commits or rolls back together.
+        conn.execute("BEGIN;")
+        for table, csv_file in CSV_SOURCES.items():
+            if not os.path.exists(csv_file):
+                if table in existing_tables:
+                    continue
+                st.error(f"Error: '{csv_file}' not found. Please make sure all required CSV files are in the correct directory.")
+                st.stop()
+
+            csv_mtime = os.path.getmtime(csv_file)
+            # Tables that predate the marker are adopted as-is rather than reloaded.
+            if table in existing_tables and loaded_mtimes.get(table, csv_mtime) == csv_mtime:
+                conn.execute("INSERT OR REPLACE INTO schema_version VALUES (?, ?);", (table, csv_mtime))
+                continue
+
+            df = read_csv_fast(csv_file)
+            # Not df.to_sql: pandas commits after every call, which would split the reload
+            # into one transaction per table.
+            conn.execute(f'DROP TABLE IF EXISTS "{table}";')
+            conn.execute(pd.io.sql.get_schema(df, table))
+            placeholders = ', '.join('?' * len(df.columns))
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders});', rows)
+            conn.execute("INSERT OR REPLACE INTO schema_version VALUES (?, ?);", (table, csv_mtime))
+            print(f"Loaded table '{table}' from {csv_file}.")
+
+    # Index the join keys and common filter columns, then refresh planner statistics
+    conn.executescript("""
+        CREATE INDEX IF NOT EXISTS idx_providers_id ON providers(Provider_ID);
+        CREATE INDEX IF NOT EXISTS idx_receivers_id ON receivers(Receiver_ID);
+        CREATE INDEX IF NOT EXISTS idx_fl_food_id ON food_listings(Food_ID);
+        CREATE INDEX IF NOT EXISTS idx_fl_provider ON food_listings(Provider_ID);
+        CREATE INDEX IF NOT EXISTS idx_fl_expiry ON food_listings(Expiry_Date);
+        CREATE INDEX IF NOT EXISTS idx_fl_location ON food_listings(Location);
+        CREATE INDEX IF NOT EXISTS idx_fl_provider_type ON food_listings(Provider_Type);
+        CREATE INDEX IF NOT EXISTS idx_fl_food_type ON food_listings(Food_Type);
+        CREATE INDEX IF NOT EXISTS idx_fl_meal_type ON food_listings(Meal_Type);
+        CREATE INDEX IF NOT EXISTS idx_fl_name ON food_listings(Food_Name COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_claims_food ON claims(Food_ID);
+        CREATE INDEX IF NOT EXISTS idx_claims_receiver ON claims(Receiver_ID);
+        CREATE INDEX IF NOT EXISTS idx_claims_status ON claims(Status);
+        CREATE INDEX IF NOT EXISTS idx_claims_timestamp ON claims(Timestamp DESC);
+        CREATE INDEX IF NOT EXISTS idx_receivers_city ON receivers(City);
+        CREATE INDEX IF NOT EXISTS idx_providers_city ON providers(City);
+        DROP INDEX IF EXISTS idx_fl_filters;
+        ANALYZE;
+    """)
+    conn.close()
+
+# Initialize the database at the start
+init_database()
+
+@st.cache_resource
+def get_connection():
+    """
+    Opens the app's SQLite connection. This function is cached so every rerun and
+    session shares one connection, keeping SQLite's page cache warm between queries.
+    """
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    # Tune the connection for a read-heavy workload: WAL lets reads proceed during writes,
+    # and the larger page cache / memory map keep repeated Analytics scans off the disk.
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+    conn.execute("PRAGMA cache_size=-65536;")
+    conn.execute("PRAGMA foreign_keys=ON;")
+    return conn
 
-# @st.cache_resource
-# def init_database():
-#     """
-#     Initializes the SQLite database from CSV files. This function is cached
-#     so it only runs once per session, preventing data reloads on every interaction.
-#     """
-#     if os.path.exists(DB_NAME):
-#         os.remove(DB_NAME) # Start fresh each time the app launches
-
-#     try:
-#         providers_df = pd.read_csv('providers_data.csv')
-#         receivers_df = pd.read_csv('receivers_data.csv')
-#         food_listings_df = pd.read_csv('food_listings_data.csv')
-#         claims_df = pd.read_csv('claims_data.csv')
-#     except FileNotFoundError as e:
-#         st.error(f"Error: {e}. Please make sure all required CSV files are in the correct directory.")
-#         st.stop()
-
-#     conn = sqlite3.connect(DB_NAME)
-#     providers_df.to_sql('providers', conn, if_exists='replace', index=False)
-#     receivers_df.to_sql('receivers', conn, if_exists='replace', index=False)
-#     food_listings_df.to_sql('food_listings', conn, if_exists='replace', index=False)
-#     claims_df.to_sql('claims', conn, if_exists='replace', index=False)
-#     conn.close()
-#     print("Database initialized and populated from CSVs.")
-
-# # Initialize the database at the start
-# init_database()
-# Create a persistent connection for the app session
-conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+@st.cache_resource
+def get_write_lock():
+    """Returns the lock that serializes writes on the shared connection across sessions."""
+    return threading.Lock()
+
+conn = get_connection()
+write_lock = get_write_lock()
 
 
 # --- Load ML Model ---
@@ -71,6 +152,46 @@ def load_model():
 
 model = load_model()
 
+# Model inputs, in the order the Predict page passes them
+PREDICTION_FEATURES = ('Provider_Type', 'Location', 'Food_Type', 'Meal_Type')
+# Lookup key for cities the model was not trained on; the encoder ignores unknown
+# categories, so they all get the same prediction
+UNKNOWN_LOCATION = '<unknown>'
+
+@st.cache_resource
+def build_prediction_lut():
+    """
+    Predicts every combination of the categories the model was trained on in a single batch,
+    so the Predict page can look results up instead of calling the model per click. Keyed on
+    the encoder rather than the data, so new listings never trigger a rebuild. Returns None
+    if the model doesn't expose its categories.
+    """
+    try:
+        encoder = model.named_steps['preprocessor'].named_transformers_['cat']
+        categories = dict(zip(encoder.feature_names_in_, encoder.categories_))
+    except (AttributeError, KeyError):
+        return None
+    if set(categories) != set(PREDICTION_FEATURES):
+        return None
+
+    categories['Location'] = [*categories['Location'], UNKNOWN_LOCATION]
+    combinations = pd.MultiIndex.from_product(
+        [categories[col] for col in PREDICTION_FEATURES], names=PREDICTION_FEATURES
+    )
+    predictions = model.predict(combinations.to_frame(index=False))
+    return {key: int(round(prediction)) for key, prediction in zip(combinations, predictions)}
+
+prediction_lut = build_prediction_lut() if model is not None else None
+
+def predict_quantity(p_type, loc, f_type, m_type):
+    """Returns the predicted quantity from the lookup table, calling the model only for inputs it doesn't cover."""
+    if prediction_lut is not None:
+        for key in ((p_type, loc, f_type, m_type), (p_type, UNKNOWN_LOCATION, f_type, m_type)):
+            if key in prediction_lut:
+                return prediction_lut[key]
+    input_data = pd.DataFrame([dict(zip(PREDICTION_FEATURES, (p_type, loc, f_type, m_type)))])
+    return int(round(model.predict(input_data)[0]))
+
 
 # --- Helper Functions ---
 def execute_query(query, params=None):
@@ -79,14 +200,168 @@ def execute_query(query, params=None):
         return pd.read_sql_query(query, conn, params=params)
     return pd.read_sql_query(query, conn)
 
-def run_commit(query, params=None):
-    """Runs a SQL command that modifies the database (INSERT, UPDATE, DELETE)."""
-    cursor = conn.cursor()
-    if params:
-        cursor.execute(query, params)
-    else:
-        cursor.execute(query)
-    conn.commit()
+def fetch_row(query, params=()):
+    """Returns the first result row as a tuple, skipping the DataFrame build for scalar lookups."""
+    return conn.execute(query, params).fetchone()
+
+def run_commit(query, params=None, many=False):
+    """
+    Runs a SQL command that modifies the database (INSERT, UPDATE, DELETE).
+    With `many=True`, `params` is a sequence of parameter rows inserted in one executemany batch.
+    """
+    try:
+        with write_lock, conn:
+            if many:
+                conn.executemany(query, params)
+            else:
+                conn.execute(query, params or ())
+    finally:
+        # Other sessions read on the same connection, so a failed write may still have been cached
+        clear_cached_queries()
+
+def run_commit_many(statements):
+    """Runs several (query, params) modifications in a single transaction."""
+    try:
+        with write_lock, conn:
+            for query, params in statements:
+                conn.execute(query, params)
+    finally:
+        clear_cached_queries()
+
+# Maximum number of matches offered by the Manage Listings search
+LISTING_SEARCH_LIMIT = 20
+# Largest value SQLite can store in an INTEGER column
+SQLITE_MAX_INTEGER = 2**63 - 1
+
+def search_listings(search):
+    """
+    Returns (Food_ID, Food_Name) rows for listings whose name starts with `search`, or the
+    listing with that ID when `search` is a number. The prefix LIKE is served by idx_fl_name.
+    Listings added through the app have no Food_ID and cannot be selected, so they are skipped.
+    """
+    # Only plain ASCII digits within SQLite's 64-bit INTEGER range are treated as an ID
+    if search.isascii() and search.isdigit() and int(search) <= SQLITE_MAX_INTEGER:
+        return execute_query("SELECT Food_ID, Food_Name FROM food_listings WHERE Food_ID = ?", (int(search),))
+    pattern = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return execute_query(
+        "SELECT Food_ID, Food_Name FROM food_listings WHERE Food_Name LIKE ? ESCAPE '\\' AND Food_ID IS NOT NULL ORDER BY Food_Name COLLATE NOCASE LIMIT ?",
+        (pattern, LISTING_SEARCH_LIMIT)
+    )
+
+def listing_search_options(key):
+    """Renders the listing search box and returns a {label: Food_ID} dict of the matches."""
+    search = st.text_input("Search by name (or enter a listing ID)", key=key)
+    matching_listings = search_listings(search.strip())
+    food_ids = matching_listings['Food_ID'].astype(int)
+    listing_labels = matching_listings['Food_Name'].astype(str) + ' (ID: ' + food_ids.astype(str) + ')'
+    return dict(zip(listing_labels.tolist(), food_ids.tolist()))
+
+# Rows shown per page for tables that can grow with the data
+PAGE_SIZE = 100
+
+def paginate(df, key):
+    """Returns one page of `df`, adding a page picker when it has more than PAGE_SIZE rows."""
+    if len(df) <= PAGE_SIZE:
+        return df
+    n_pages = (len(df) - 1) // PAGE_SIZE + 1
+    page_number = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1, key=key)
+    start = (page_number - 1) * PAGE_SIZE
+    return df.iloc[start:start + PAGE_SIZE]
+
+# Chart specs are keyed on the DataFrame contents, so they stay valid across writes
+@st.cache_data(max_entries=64)
+def build_bar_chart(df, x, y):
+    """Builds the Altair bar chart of `y` per `x`."""
+    return alt.Chart(df).mark_bar().encode(x=alt.X(field=x, type="nominal"), y=alt.Y(field=y, type="quantitative"), tooltip=[x, y])
+
+@st.cache_data(max_entries=64)
+def build_pie_chart(df, theta, color, title):
+    """Builds the Altair donut chart of `theta` split by `color`."""
+    return alt.Chart(df).mark_arc(innerRadius=50).encode(theta=alt.Theta(field=theta, type="quantitative"), color=alt.Color(field=color, type="nominal", title=title), tooltip=list(df.columns)).properties(title=f"{title} Distribution")
+
+def clear_cached_queries():
+    """Cached lookups are derived from the tables, so drop them after any write."""
+    get_filter_domains.clear()
+    get_dashboard_metrics.clear()
+    load_joined_listings.clear()
+    get_provider_contacts.clear()
+    cached_query.clear()
+    run_queries_parallel.clear()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_query(query, params=()):
+    """Same as execute_query, but memoized until the next database write."""
+    return execute_query(query, params)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def run_queries_parallel(queries):
+    """
+    Runs independent read-only queries on a thread pool, each on its own connection
+    (WAL mode allows concurrent readers). Results are memoized until the next database
+    write and returned in the same order as `queries`.
+    """
+    def read(query):
+        with closing(sqlite3.connect(DB_NAME)) as local_conn:
+            # Memory-map the file like the main connection, so workers read pages zero-copy
+            local_conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+            local_conn.execute("PRAGMA temp_store=MEMORY;")
+            return pd.read_sql_query(query, local_conn)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(read, queries))
+
+# food_listings columns offered as filter / model input options
+FILTER_COLUMNS = ("Location", "Provider_Type", "Food_Type", "Meal_Type")
+
+@st.cache_data(ttl=600)
+def get_filter_domains():
+    """Returns the distinct values of each filter column, cached across reruns."""
+    # One round-trip for all columns; the Col discriminator says which column each value belongs to
+    query = "\nUNION ALL\n".join(
+        f"SELECT '{col}' AS Col, {col} AS Value FROM food_listings GROUP BY {col}"
+        for col in FILTER_COLUMNS
+    )
+    domains = {col: [] for col in FILTER_COLUMNS}
+    for col, value in conn.execute(query):
+        domains[col].append(value)
+    return domains
+
+@st.cache_data(ttl=60)
+def get_dashboard_metrics():
+    """Returns the four Dashboard counts from a single query."""
+    return fetch_row("""
+        SELECT
+            (SELECT COUNT(DISTINCT Provider_ID) FROM providers),
+            (SELECT COUNT(DISTINCT Receiver_ID) FROM receivers),
+            (SELECT COUNT(DISTINCT Food_ID) FROM food_listings),
+            (SELECT COUNT(DISTINCT Claim_ID) FROM claims);
+    """)
+
+@st.cache_data(ttl=120)
+def load_joined_listings():
+    """Returns every food listing joined with its provider's details, for filtering in pandas."""
+    return execute_query("""
+        SELECT
+            fl.Food_Name, fl.Quantity, fl.Expiry_Date, fl.Location, fl.Food_Type, fl.Meal_Type,
+            p.Name as ProviderName, p.Type as ProviderType, p.Contact as ProviderContact,
+            fl.Provider_Type
+        FROM food_listings fl
+        JOIN providers p ON fl.Provider_ID = p.Provider_ID
+    """)
+
+def get_filtered_listings(filters):
+    """Returns the food listings matching `filters`, using boolean masks over the cached join."""
+    listings = load_joined_listings()
+    mask = pd.Series(True, index=listings.index)
+    for col, values in filters:
+        mask &= listings[col].isin(values)
+    return listings.loc[mask].drop(columns='Provider_Type').reset_index(drop=True)
+
+@st.cache_data(ttl=120)
+def get_provider_contacts(filters):
+    """Returns the distinct provider contact details of the listings matching `filters`, memoized per filter state."""
+    contacts = get_filtered_listings(filters)[['ProviderName', 'ProviderType', 'ProviderContact', 'Location']]
+    return contacts.drop_duplicates(ignore_index=True)
 
 # --- Sidebar Navigation ---
 st.sidebar.title("Navigation")
@@ -102,10 +377,7 @@ if page == "Dashboard":
     # --- Key Metrics ---
     st.header("System Overview")
 
-    total_providers = execute_query("SELECT COUNT(DISTINCT Provider_ID) FROM providers;").iloc[0,0]
-    total_receivers = execute_query("SELECT COUNT(DISTINCT Receiver_ID) FROM receivers;").iloc[0,0]
-    total_food_listings = execute_query("SELECT COUNT(DISTINCT Food_ID) FROM food_listings;").iloc[0,0]
-    total_claims = execute_query("SELECT COUNT(DISTINCT Claim_ID) FROM claims;").iloc[0,0]
+    total_providers, total_receivers, total_food_listings, total_claims = get_dashboard_metrics()
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Total Food Providers", f"{total_providers}")
@@ -124,7 +396,7 @@ if page == "Dashboard":
         WHERE Expiry_Date BETWEEN date('now') AND date('now', '+3 days')
         ORDER BY Expiry_Date ASC;
     """
-    expiring_df = execute_query(expiring_soon_query)
+    expiring_df = cached_query(expiring_soon_query)
     st.dataframe(expiring_df, use_container_width=True)
 
     st.divider()
@@ -133,13 +405,12 @@ if page == "Dashboard":
     st.header("Recent Claims Activity")
     recent_claims_query = """
         SELECT c.Timestamp, fl.Food_Name, r.Name as ReceiverName, c.Status
-        FROM claims c
+        FROM (SELECT * FROM claims ORDER BY Timestamp DESC LIMIT 10) c
         JOIN food_listings fl ON c.Food_ID = fl.Food_ID
         JOIN receivers r ON c.Receiver_ID = r.Receiver_ID
-        ORDER BY c.Timestamp DESC
-        LIMIT 10;
+        ORDER BY c.Timestamp DESC;
     """
-    recent_claims_df = execute_query(recent_claims_query)
+    recent_claims_df = cached_query(recent_claims_query)
     st.dataframe(recent_claims_df, use_container_width=True)
 
 # =================================================================================================
@@ -152,10 +423,11 @@ elif page == "Browse & Claim Food":
     # --- Filtering Options ---
     st.sidebar.header("Filter Options")
 
-    cities = execute_query("SELECT DISTINCT Location FROM food_listings;")['Location'].tolist()
-    provider_types = execute_query("SELECT DISTINCT Provider_Type FROM food_listings;")['Provider_Type'].tolist()
-    food_types = execute_query("SELECT DISTINCT Food_Type FROM food_listings;")['Food_Type'].tolist()
-    meal_types = execute_query("SELECT DISTINCT Meal_Type FROM food_listings;")['Meal_Type'].tolist()
+    domains = get_filter_domains()
+    cities = domains["Location"]
+    provider_types = domains["Provider_Type"]
+    food_types = domains["Food_Type"]
+    meal_types = domains["Meal_Type"]
 
     selected_city = st.sidebar.multiselect("City", cities, default=cities)
     selected_provider_type = st.sidebar.multiselect("Provider Type", provider_types, default=provider_types)
@@ -163,28 +435,21 @@ elif page == "Browse & Claim Food":
     selected_meal_type = st.sidebar.multiselect("Meal Type", meal_types, default=meal_types)
 
     # --- Dynamic Query for Filtering ---
-    query = """
-        SELECT
-            fl.Food_Name, fl.Quantity, fl.Expiry_Date, fl.Location, fl.Food_Type, fl.Meal_Type,
-            p.Name as ProviderName, p.Type as ProviderType, p.Contact as ProviderContact
-        FROM food_listings fl
-        JOIN providers p ON fl.Provider_ID = p.Provider_ID
-        WHERE fl.Location IN ({})
-        AND fl.Provider_Type IN ({})
-        AND fl.Food_Type IN ({})
-        AND fl.Meal_Type IN ({})
-    """.format(
-        ','.join('?' for _ in selected_city),
-        ','.join('?' for _ in selected_provider_type),
-        ','.join('?' for _ in selected_food_type),
-        ','.join('?' for _ in selected_meal_type)
+    # A filter with every option selected matches all rows, so it is left out of the query
+    filters = tuple(
+        (col, tuple(sorted(selected)))
+        for col, selected, options in [
+            ("Location", selected_city, cities),
+            ("Provider_Type", selected_provider_type, provider_types),
+            ("Food_Type", selected_food_type, food_types),
+            ("Meal_Type", selected_meal_type, meal_types),
+        ]
+        if set(selected) != set(options)
     )
 
-    params = selected_city + selected_provider_type + selected_food_type + selected_meal_type
-
-    filtered_data = execute_query(query, params)
+    filtered_data = get_filtered_listings(filters)
 
-    st.dataframe(filtered_data, use_container_width=True)
+    st.dataframe(paginate(filtered_data, key="browse_listings_page"), use_container_width=True)
 
     st.info(f"Showing {len(filtered_data)} listings based on your filters.")
 
@@ -193,8 +458,8 @@ elif page == "Browse & Claim Food":
     st.markdown("Contact providers directly to coordinate pickup.")
 
     if not filtered_data.empty:
-        contact_info = filtered_data[['ProviderName', 'ProviderType', 'ProviderContact', 'Location']].drop_duplicates().reset_index(drop=True)
-        st.dataframe(contact_info, use_container_width=True)
+        contact_info = get_provider_contacts(filters)
+        st.dataframe(paginate(contact_info, key="browse_contacts_page"), use_container_width=True)
     else:
         st.warning("No listings match the current filters.")
 
@@ -209,8 +474,11 @@ elif page == "Manage Listings (CRUD)":
 
     if crud_option == "Add New Listing":
         st.header("Add a New Food Listing")
-        providers_list = execute_query("SELECT Provider_ID, Name FROM providers;")
-        provider_map = {name: pid for pid, name in zip(providers_list['Provider_ID'], providers_list['Name'])}
+        providers_list = execute_query("SELECT Provider_ID, Name, Type, City FROM providers;")
+        provider_map = dict(zip(
+            providers_list['Name'].tolist(),
+            zip(providers_list['Provider_ID'].tolist(), providers_list['Type'].tolist(), providers_list['City'].tolist())
+        ))
 
         with st.form("add_listing_form"):
             provider_name = st.selectbox("Select Your Organization", options=list(provider_map.keys()))
@@ -222,10 +490,7 @@ elif page == "Manage Listings (CRUD)":
             submitted = st.form_submit_button("Add Listing")
 
         if submitted:
-            provider_id = provider_map[provider_name]
-            provider_details = execute_query(f"SELECT Type, City FROM providers WHERE Provider_ID = {provider_id}")
-            provider_type = provider_details['Type'][0]
-            location = provider_details['City'][0]
+            provider_id, provider_type, location = provider_map[provider_name]
             insert_query = "INSERT INTO food_listings (Food_Name, Quantity, Expiry_Date, Provider_ID, Location, Food_Type, Meal_Type, Provider_Type) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
             run_commit(insert_query, (food_name, quantity, expiry_date.strftime('%Y-%m-%d'), provider_id, location, food_type, meal_type, provider_type))
             st.success(f"Successfully added listing for '{food_name}'!")
@@ -233,13 +498,12 @@ elif page == "Manage Listings (CRUD)":
 
     elif crud_option == "Update Existing Listing":
         st.header("Update an Existing Food Listing")
-        all_listings = execute_query("SELECT Food_ID, Food_Name FROM food_listings")
-        listing_options = {f"{row['Food_Name']} (ID: {row['Food_ID']})": row['Food_ID'] for _, row in all_listings.iterrows()}
+        listing_options = listing_search_options(key="update_listing_search")
         selected_listing_str = st.selectbox("Select Listing to Update", options=list(listing_options.keys()))
 
         if selected_listing_str:
             food_id_to_update = listing_options[selected_listing_str]
-            current_data = execute_query(f"SELECT * FROM food_listings WHERE Food_ID = {food_id_to_update}").iloc[0]
+            current_data = execute_query("SELECT * FROM food_listings WHERE Food_ID = ?", (food_id_to_update,)).iloc[0]
 
             with st.form("update_listing_form"):
                 st.write(f"**Updating:** {current_data['Food_Name']}")
@@ -258,17 +522,17 @@ elif page == "Manage Listings (CRUD)":
 
     elif crud_option == "Remove Listing":
         st.header("Remove a Food Listing")
-        all_listings = execute_query("SELECT Food_ID, Food_Name FROM food_listings")
-        listing_options = {f"{row['Food_Name']} (ID: {row['Food_ID']})": row['Food_ID'] for _, row in all_listings.iterrows()}
+        listing_options = listing_search_options(key="remove_listing_search")
         selected_listing_str = st.selectbox("Select Listing to Remove", options=list(listing_options.keys()))
 
-        if st.button("Remove Listing", type="primary"):
+        if selected_listing_str and st.button("Remove Listing", type="primary"):
 
             food_id_to_delete = listing_options[selected_listing_str]
-            run_commit(f"DELETE FROM claims WHERE Food_ID = {food_id_to_delete}")
-            run_commit(f"DELETE FROM food_listings WHERE Food_ID = {food_id_to_delete}")
+            run_commit_many([
+                ("DELETE FROM claims WHERE Food_ID = ?", (food_id_to_delete,)),
+                ("DELETE FROM food_listings WHERE Food_ID = ?", (food_id_to_delete,)),
+            ])
             st.success(f"Successfully removed listing ID {food_id_to_delete} and associated claims.")
-            st.experimental_rerun()
 
   # =================================================================================================
   # PAGE 4: ANALYTICS & INSIGHTS
@@ -277,42 +541,40 @@ elif page == "Analytics & Insights":
       st.title("Analytics & Insights")
       st.markdown("Deep dive into the data to understand trends in food donation, claims, and distribution.")
 
-      def display_query_and_result(query, title, chart_type=None, chart_params=None):
+      def display_query_and_result(query, df, title, chart_type=None, chart_params=None):
           st.subheader(title)
           with st.expander("View SQL Query"):
               st.code(query, language='sql')
-          df = execute_query(query)
-          st.dataframe(df, use_container_width=True)
+          st.dataframe(paginate(df, key=f"analytics_page_{title}"), use_container_width=True)
           if chart_type and not df.empty:
               if chart_type == 'bar':
-                  st.bar_chart(df.set_index(chart_params['x']), y=chart_params['y'])
+                  st.altair_chart(build_bar_chart(df, **chart_params), use_container_width=True)
+              elif chart_type == 'pie':
+                  st.altair_chart(build_pie_chart(df, **chart_params), use_container_width=True)
           st.divider()
 
-      display_query_and_result("SELECT p.City, COUNT(DISTINCT p.Provider_ID) AS NumberOfProviders, COUNT(DISTINCT r.Receiver_ID) AS NumberOfReceivers FROM providers p LEFT JOIN receivers r ON p.City = r.City GROUP BY p.City;", "1. Number of Food Providers and Receivers by City")
-      display_query_and_result("SELECT p.Type, SUM(fl.Quantity) AS TotalQuantityDonated FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID GROUP BY p.Type ORDER BY TotalQuantityDonated DESC;", "2. Top Contributing Provider Types by Food Quantity", chart_type='bar', chart_params={'x': 'Type', 'y': 'TotalQuantityDonated'})
-      display_query_and_result("SELECT Name, Type, Address, Contact FROM providers WHERE City = 'Bangalore';", "3. Contact Information for Providers in Bangalore")
-      display_query_and_result("SELECT r.Name, r.Type, r.City, COUNT(c.Claim_ID) AS NumberOfClaims FROM claims c JOIN receivers r ON c.Receiver_ID = r.Receiver_ID GROUP BY r.Receiver_ID ORDER BY NumberOfClaims DESC LIMIT 10;", "4. Top Receivers by Number of Claims", chart_type='bar', chart_params={'x': 'Name', 'y': 'NumberOfClaims'})
-      display_query_and_result("SELECT SUM(Quantity) AS TotalAvailableQuantity FROM food_listings;", "5. Total Quantity of Food Available")
-      display_query_and_result("SELECT Location, COUNT(Food_ID) AS NumberOfListings FROM food_listings GROUP BY Location ORDER BY NumberOfListings DESC;", "6. Number of Food Listings by City", chart_type='bar', chart_params={'x': 'Location', 'y': 'NumberOfListings'})
-      display_query_and_result("SELECT Food_Type, COUNT(Food_ID) AS ListingCount FROM food_listings GROUP BY Food_Type ORDER BY ListingCount DESC;", "7. Most Common Food Types Available")
-      display_query_and_result("SELECT fl.Food_Name, COUNT(c.Claim_ID) AS NumberOfClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID GROUP BY fl.Food_ID ORDER BY NumberOfClaims DESC;", "8. Number of Claims per Food Item")
-      display_query_and_result("SELECT p.Name, p.Type, COUNT(c.Claim_ID) AS SuccessfulClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID JOIN providers p ON fl.Provider_ID = p.Provider_ID WHERE c.Status = 'Completed' GROUP BY p.Provider_ID ORDER BY SuccessfulClaims DESC;", "9. Providers with Most Successful Claims")
-
-      query10 = "SELECT Status, COUNT(*) AS ClaimCount, (COUNT(*) * 100.0 / (SELECT COUNT(*) FROM claims)) AS Percentage FROM claims GROUP BY Status;"
-      st.subheader("10. Percentage Distribution of Claim Statuses")
-      with st.expander("View SQL Query"): st.code(query10, language='sql')
-      df10 = execute_query(query10)
-      st.dataframe(df10, use_container_width=True)
-      if not df10.empty:
-          pie_chart = alt.Chart(df10).mark_arc(innerRadius=50).encode(theta=alt.Theta(field="Percentage", type="quantitative"), color=alt.Color(field="Status", type="nominal", title="Claim Status"), tooltip=['Status', 'ClaimCount', 'Percentage']).properties(title="Claim Status Distribution")
-          st.altair_chart(pie_chart, use_container_width=True)
-      st.divider()
-
-      display_query_and_result("SELECT r.Name, AVG(fl.Quantity) AS AverageQuantityPerClaim FROM claims c JOIN receivers r ON c.Receiver_ID = r.Receiver_ID JOIN food_listings fl ON c.Food_ID = fl.Food_ID WHERE c.Status = 'Completed' GROUP BY r.Receiver_ID ORDER BY AverageQuantityPerClaim DESC;", "11. Average Quantity of Food per Claim for Each Receiver")
-      display_query_and_result("SELECT fl.Meal_Type, COUNT(c.Claim_ID) AS NumberOfClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID GROUP BY fl.Meal_Type ORDER BY NumberOfClaims DESC;", "12. Most Claimed Meal Types", chart_type='bar', chart_params={'x': 'Meal_Type', 'y': 'NumberOfClaims'})
-      display_query_and_result("SELECT p.Name, p.City, SUM(fl.Quantity) AS TotalQuantityDonated FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID GROUP BY p.Provider_ID ORDER BY TotalQuantityDonated DESC;", "13. Total Food Quantity Donated by Each Provider")
-      display_query_and_result("SELECT Food_Name, Quantity, Expiry_Date, Location FROM food_listings WHERE Expiry_Date BETWEEN date('now') AND date('now', '+3 days') ORDER BY Expiry_Date ASC;", "14. Food Items Expiring in the Next 3 Days")
-      display_query_and_result("SELECT p.Name, p.Type, p.City, fl.Food_Name, fl.Quantity FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID LEFT JOIN claims c ON fl.Food_ID = c.Food_ID WHERE c.Claim_ID IS NULL;", "15. Providers with Unclaimed Food Listings")
+      # (title, query, chart_type, chart_params) for each insight, rendered in this order
+      analytics_queries = [
+          ("1. Number of Food Providers and Receivers by City", "SELECT p.City, COUNT(DISTINCT p.Provider_ID) AS NumberOfProviders, COUNT(DISTINCT r.Receiver_ID) AS NumberOfReceivers FROM providers p LEFT JOIN receivers r ON p.City = r.City GROUP BY p.City;", None, None),
+          ("2. Top Contributing Provider Types by Food Quantity", "SELECT p.Type, SUM(fl.Quantity) AS TotalQuantityDonated FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID GROUP BY p.Type ORDER BY TotalQuantityDonated DESC;", 'bar', {'x': 'Type', 'y': 'TotalQuantityDonated'}),
+          ("3. Contact Information for Providers in Bangalore", "SELECT Name, Type, Address, Contact FROM providers WHERE City = 'Bangalore';", None, None),
+          ("4. Top Receivers by Number of Claims", "SELECT r.Name, r.Type, r.City, c.NumberOfClaims FROM (SELECT Receiver_ID, COUNT(Claim_ID) AS NumberOfClaims FROM claims GROUP BY Receiver_ID ORDER BY NumberOfClaims DESC LIMIT 10) c JOIN receivers r ON c.Receiver_ID = r.Receiver_ID ORDER BY c.NumberOfClaims DESC;", 'bar', {'x': 'Name', 'y': 'NumberOfClaims'}),
+          ("5. Total Quantity of Food Available", "SELECT SUM(Quantity) AS TotalAvailableQuantity FROM food_listings;", None, None),
+          ("6. Number of Food Listings by City", "SELECT Location, COUNT(Food_ID) AS NumberOfListings FROM food_listings GROUP BY Location ORDER BY NumberOfListings DESC;", 'bar', {'x': 'Location', 'y': 'NumberOfListings'}),
+          ("7. Most Common Food Types Available", "SELECT Food_Type, COUNT(Food_ID) AS ListingCount FROM food_listings GROUP BY Food_Type ORDER BY ListingCount DESC;", None, None),
+          ("8. Number of Claims per Food Item", "SELECT fl.Food_Name, COUNT(c.Claim_ID) AS NumberOfClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID GROUP BY fl.Food_ID ORDER BY NumberOfClaims DESC;", None, None),
+          ("9. Providers with Most Successful Claims", "SELECT p.Name, p.Type, COUNT(c.Claim_ID) AS SuccessfulClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID JOIN providers p ON fl.Provider_ID = p.Provider_ID WHERE c.Status = 'Completed' GROUP BY p.Provider_ID ORDER BY SuccessfulClaims DESC;", None, None),
+          ("10. Percentage Distribution of Claim Statuses", "SELECT Status, COUNT(*) AS ClaimCount, COUNT(*) * 100.0 / SUM(COUNT(*)) OVER () AS Percentage FROM claims GROUP BY Status;", 'pie', {'theta': 'Percentage', 'color': 'Status', 'title': 'Claim Status'}),
+          ("11. Average Quantity of Food per Claim for Each Receiver", "SELECT r.Name, AVG(fl.Quantity) AS AverageQuantityPerClaim FROM claims c JOIN receivers r ON c.Receiver_ID = r.Receiver_ID JOIN food_listings fl ON c.Food_ID = fl.Food_ID WHERE c.Status = 'Completed' GROUP BY r.Receiver_ID ORDER BY AverageQuantityPerClaim DESC;", None, None),
+          ("12. Most Claimed Meal Types", "SELECT fl.Meal_Type, COUNT(c.Claim_ID) AS NumberOfClaims FROM claims c JOIN food_listings fl ON c.Food_ID = fl.Food_ID GROUP BY fl.Meal_Type ORDER BY NumberOfClaims DESC;", 'bar', {'x': 'Meal_Type', 'y': 'NumberOfClaims'}),
+          ("13. Total Food Quantity Donated by Each Provider", "SELECT p.Name, p.City, SUM(fl.Quantity) AS TotalQuantityDonated FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID GROUP BY p.Provider_ID ORDER BY TotalQuantityDonated DESC;", None, None),
+          ("14. Food Items Expiring in the Next 3 Days", "SELECT Food_Name, Quantity, Expiry_Date, Location FROM food_listings WHERE Expiry_Date BETWEEN date('now') AND date('now', '+3 days') ORDER BY Expiry_Date ASC;", None, None),
+          ("15. Providers with Unclaimed Food Listings", "SELECT p.Name, p.Type, p.City, fl.Food_Name, fl.Quantity FROM food_listings fl JOIN providers p ON fl.Provider_ID = p.Provider_ID WHERE NOT EXISTS (SELECT 1 FROM claims c WHERE c.Food_ID = fl.Food_ID);", None, None),
+      ]
+
+      results = run_queries_parallel(tuple(query for _, query, _, _ in analytics_queries))
+      for (title, query, chart_type, chart_params), df in zip(analytics_queries, results):
+          display_query_and_result(query, df, title, chart_type, chart_params)
 
   # =================================================================================================
   # PAGE 5: PREDICT DONATION QUANTITY
@@ -323,10 +585,11 @@ elif page == "Predict Donation Quantity":
 
       if model is not None:
           # Get options for dropdowns from the data
-          provider_types = execute_query("SELECT DISTINCT Provider_Type FROM food_listings;")['Provider_Type'].tolist()
-          locations = execute_query("SELECT DISTINCT Location FROM food_listings;")['Location'].tolist()
-          food_types = execute_query("SELECT DISTINCT Food_Type FROM food_listings;")['Food_Type'].tolist()
-          meal_types = execute_query("SELECT DISTINCT Meal_Type FROM food_listings;")['Meal_Type'].tolist()
+          domains = get_filter_domains()
+          provider_types = domains["Provider_Type"]
+          locations = domains["Location"]
+          food_types = domains["Food_Type"]
+          meal_types = domains["Meal_Type"]
 
           with st.form("prediction_form"):
               st.header("Enter Donation Details")
@@ -338,17 +601,8 @@ elif page == "Predict Donation Quantity":
               predict_button = st.form_submit_button("Predict Quantity")
 
               if predict_button:
-                  # Create a DataFrame for the model's input
-                  input_data = pd.DataFrame({
-                      'Provider_Type': [p_type],
-                      'Location': [loc],
-                      'Food_Type': [f_type],
-                      'Meal_Type': [m_type]
-                  })
-
-                  # Make prediction
-                  prediction = model.predict(input_data)
-                  predicted_quantity = int(round(prediction[0]))
+                  # All inputs are categorical, so every possible prediction is precomputed
+                  predicted_quantity = predict_quantity(p_type, loc, f_type, m_type)
 
                   st.success(f"**Predicted Donation Quantity:** {predicted_quantity} units")
                   st.info("This prediction is based on historical data of similar donations.")